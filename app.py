@@ -11,8 +11,14 @@ from pyvis.network import Network
 import tempfile
 import os
 from statistics import mean
-import math
 from itertools import combinations
+import math
+import re
+import unicodedata
+from difflib import SequenceMatcher
+import numpy as np
+from scipy.sparse import csr_matrix, triu
+from scipy.sparse.csgraph import shortest_path, connected_components
 
 st.set_page_config(page_title="Social Capital Assessment Tool", layout="wide")
 
@@ -26,7 +32,7 @@ domains = ["Family/Friends", "Work/Professional", "Education/Alumni",
 
 st.header("Step 1: Enter Contacts")
 st.write("""
-Enter at least 3 contacts per domain (ideally 5–10). You can repeat the same individual across multiple domains if applicable—just ensure that you use the exact same spelling and punctuation each time.
+Enter at least 3 contacts per domain (ideally 5–10). You can repeat the same individual across multiple domains if applicable—just ensure that you use the exact same spelling and punctuation each time. Names that look like near-duplicates (e.g., "Jon Smith" and "John Smith") will be flagged so you can merge them.
 
 **Domains:** These categories represent different spheres of your life (Family/Friends, Work/Professional, Education/Alumni, Community/Volunteering, Hobbies/Recreational Groups). Listing contacts in these domains helps you see where your resources come from.
 
@@ -98,29 +104,179 @@ st.write("### Final Contact List")
 for name, info in contact_dict.items():
     st.write(f"**{name}** | Domains: {', '.join(info['domains'])} | Avg Tie Strength: {info['avg_strength']} | Valence: {info['final_valence']}")
 
+def normalize_name(name):
+    # Case, accents, punctuation and spacing don't distinguish people
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^\w\s]", "", name.lower())
+    return " ".join(name.split())
+
+def name_ngrams(normalized, n=3):
+    padded = f" {normalized} "
+    return {padded[i:i+n] for i in range(len(padded)-n+1)}
+
+def find_duplicate_names(names, min_dice=0.5, min_similarity=0.85):
+    # Blocking index over character trigrams, weighted by rarity (IDF) so that
+    # a shared common first name contributes little. Each name only indexes its
+    # rarest trigrams (prefix filtering): any pair with weighted Dice >= min_dice
+    # shares a trigram in both prefixes, so candidates come from short posting
+    # lists instead of every pair that shares a trigram. Candidates above the
+    # threshold are then confirmed by string similarity.
+    normalized = [normalize_name(n) for n in names]
+    gram_ids = {}
+    name_grams = [[gram_ids.setdefault(g, len(gram_ids)) for g in name_ngrams(x)] for x in normalized]
+    rows = np.repeat(np.arange(len(names)), [len(g) for g in name_grams])
+    cols = np.array([g for gs in name_grams for g in gs], dtype=np.int64)
+    shape = (len(names), len(gram_ids))
+    idf = np.log((len(names) + 1) / (np.bincount(cols, minlength=len(gram_ids)) + 1)) + 1
+    grams = csr_matrix((np.ones(len(cols)), (rows, cols)), shape=shape)
+    weighted = csr_matrix((idf[cols], (rows, cols)), shape=shape)
+    sizes = np.asarray(weighted.sum(axis=1)).ravel()
+
+    prefix_rows, prefix_cols = [], []
+    for i, gs in enumerate(name_grams):
+        # Rarest first, in one global order; stop once the remaining weight
+        # can no longer reach the overlap a match would need
+        remaining = sizes[i]
+        bound = min_dice * sizes[i] / (2 - min_dice)
+        for g in sorted(gs, key=lambda g: (-idf[g], g)):
+            prefix_rows.append(i)
+            prefix_cols.append(g)
+            remaining -= idf[g]
+            if remaining < bound:
+                break
+    prefix = csr_matrix((np.ones(len(prefix_cols)), (prefix_rows, prefix_cols)), shape=shape)
+    shared = triu(prefix @ prefix.T, k=1, format='coo')
+    lo, hi = shared.row, shared.col
+
+    # Similarity can't exceed 2 * shorter / (sum of lengths)
+    lengths = np.array([len(x) for x in normalized])
+    close_length = 2 * np.minimum(lengths[lo], lengths[hi]) >= min_similarity * (lengths[lo] + lengths[hi])
+    lo, hi = lo[close_length], hi[close_length]
+    overlap = np.asarray(weighted[lo].multiply(grams[hi]).sum(axis=1)).ravel()
+    dice = 2 * overlap / (sizes[lo] + sizes[hi])
+    lo, hi = lo[dice >= min_dice], hi[dice >= min_dice]
+
+    # SequenceMatcher caches its analysis of the second string, so reuse it
+    matches = []
+    matcher = SequenceMatcher()
+    for k in np.argsort(hi, kind='stable'):
+        i, j = lo[k], hi[k]
+        if matcher.b is not normalized[j]:
+            matcher.set_seq2(normalized[j])
+        matcher.set_seq1(normalized[i])
+        if normalized[i] == normalized[j] or (matcher.quick_ratio() >= min_similarity and matcher.ratio() >= min_similarity):
+            matches.append((i, j))
+    return [(names[i], names[j]) for i, j in sorted(matches)]
+
+def merge_contacts(duplicate, keep):
+    # Runs as a button callback so the Step 1 name inputs can be updated too
+    for c in st.session_state.contacts:
+        if c['name'] == duplicate:
+            c['name'] = keep
+    for d in domains:
+        for i in range(int(st.session_state.get(f"num_{d}", 0))):
+            if st.session_state.get(f"name_{d}_{i}", "").strip() == duplicate:
+                st.session_state[f"name_{d}_{i}"] = keep
+    merged_edges = set()
+    merged_attrs = {}
+    # Edges that already use the kept name go first, so their rating wins
+    # over the renamed duplicate's when both connect to the same contact
+    for e in sorted(st.session_state.edges, key=lambda e: (duplicate in e, e)):
+        edge = tuple(sorted(keep if n == duplicate else n for n in e))
+        if edge[0] != edge[1] and edge not in merged_edges:
+            merged_edges.add(edge)
+            merged_attrs[edge] = st.session_state.edge_attrs.get(e, default_edge_attrs)
+    st.session_state.edges = merged_edges
+    st.session_state.edge_attrs = merged_attrs
+    for g in st.session_state.groups:
+        g['members'] = sorted({keep if n == duplicate else n for n in g['members']})
+    st.session_state.groups = [g for g in st.session_state.groups if len(g['members']) >= 2]
+
+def keep_separate(a, b):
+    st.session_state.distinct_names.add(frozenset([a, b]))
+
+if 'distinct_names' not in st.session_state:
+    st.session_state.distinct_names = set()
+
+# Only re-run detection when this session's contact names change. Kept per
+# session so one student's names never sit in a process-wide cache.
+contact_names = tuple(contact_dict)
+if st.session_state.get('duplicate_check', (None, None))[0] != contact_names:
+    st.session_state.duplicate_check = (contact_names, find_duplicate_names(contact_names))
+
+duplicate_pairs = [
+    (a, b) for a, b in st.session_state.duplicate_check[1]
+    if frozenset([a, b]) not in st.session_state.distinct_names
+]
+if duplicate_pairs:
+    st.write("### Possible Duplicate Contacts")
+    st.write("These names look like the same person spelled differently. Merging combines them into one contact, including their connections; keep them separate if they are different people.")
+    for a, b in duplicate_pairs:
+        # Keep the spelling used in more domains (the earlier one on a tie)
+        if len(contact_dict[b]['domains']) > len(contact_dict[a]['domains']):
+            keep, duplicate = b, a
+        else:
+            keep, duplicate = a, b
+        col1, col2, col3 = st.columns([3,1,1])
+        col1.warning(f"**{duplicate}** may be the same person as **{keep}**.")
+        col2.button(f"Merge into {keep}", key=f"merge_{duplicate}_{keep}", on_click=merge_contacts, args=(duplicate, keep))
+        col3.button("Keep separate", key=f"separate_{duplicate}_{keep}", on_click=keep_separate, args=(duplicate, keep))
+
 st.header("Step 3: Specify Connections Between Contacts")
 st.write("""
 Select pairs of contacts that know each other. This will define the edges in your network.
 
 You can either:
 - Add connections one pair at a time using the form below, OR
-- Select multiple contacts at once to create all pairwise connections among them.
+- Select multiple contacts at once to record them as a group in which everyone knows each other.
+
+Optionally, rate each connection's strength (how close those two contacts are to each other) and valence (the tone of their relationship). Connections you don't rate keep the default strength of 3 and a neutral valence.
 """)
 
 if 'edges' not in st.session_state:
     st.session_state.edges = set()
+if 'edge_attrs' not in st.session_state:
+    st.session_state.edge_attrs = {}  # edge -> (strength, valence)
+# Groups where everyone knows each other are kept as member lists rather than
+# expanded into every pair; pairs are only built when metrics are computed.
+if 'groups' not in st.session_state:
+    st.session_state.groups = []  # dicts like {members, strength, valence}
+
+default_edge_attrs = (3, "Neutral")
+
+def pair_attrs(edge):
+    # Rating in effect for a pair, or None if the two contacts aren't connected.
+    # Single connections win over groups, and later groups over earlier ones.
+    if edge in st.session_state.edges:
+        return st.session_state.edge_attrs.get(edge, default_edge_attrs)
+    for g in reversed(st.session_state.groups):
+        if edge[0] in g['members'] and edge[1] in g['members']:
+            return (g['strength'], g['valence'])
+    return None
 
 with st.form("connections_form"):
     st.write("**Add a Single Connection:**")
     contact_a = st.selectbox("Contact A", all_names)
     contact_b = st.selectbox("Contact B", all_names)
+    col1, col2 = st.columns(2)
+    edge_strength = col1.slider("Connection Strength (optional)", 1, 5, 3, key="edge_strength")
+    edge_valence = col2.selectbox("Connection Valence (optional)", ["Positive", "Neutral", "Negative"], index=1, key="edge_valence")
     add_connection = st.form_submit_button("Add Single Connection")
     if add_connection:
         if contact_a != contact_b:
             edge = tuple(sorted([contact_a, contact_b]))
-            if edge not in st.session_state.edges:
+            attrs = (edge_strength, edge_valence)
+            current_attrs = pair_attrs(edge)
+            if current_attrs is None:
                 st.session_state.edges.add(edge)
+                st.session_state.edge_attrs[edge] = attrs
                 st.success(f"Added connection: {edge[0]} <--> {edge[1]}")
+            elif current_attrs != attrs:
+                # A single connection overrides the rating of any group it belongs to
+                st.session_state.edges.add(edge)
+                st.session_state.edge_attrs[edge] = attrs
+                st.success(f"Updated strength and valence of: {edge[0]} <--> {edge[1]}")
             else:
                 st.info("This connection already exists.")
         else:
@@ -133,43 +289,162 @@ selected_contacts = st.multiselect(
     "Select multiple contacts to connect them all to each other",
     all_names
 )
+col1, col2 = st.columns(2)
+group_strength = col1.slider("Strength of these connections (optional)", 1, 5, 3, key="group_strength")
+group_valence = col2.selectbox("Valence of these connections (optional)", ["Positive", "Neutral", "Negative"], index=1, key="group_valence")
 
 if st.button("Add Selected Connections"):
     if len(selected_contacts) < 2:
         st.warning("Select at least two contacts to form connections.")
     else:
-        new_edges = 0
-        for combo in combinations(selected_contacts, 2):
-            edge = tuple(sorted(combo))
-            if edge not in st.session_state.edges:
-                st.session_state.edges.add(edge)
-                new_edges += 1
-        if new_edges > 0:
-            st.success(f"Added {new_edges} new connections among the selected contacts.")
+        members = sorted(set(selected_contacts))
+        existing = next((g for g in st.session_state.groups if g['members'] == members), None)
+        if existing is not None and (existing['strength'], existing['valence']) != (group_strength, group_valence):
+            # Move it to the end so the new rating also wins over overlapping groups
+            st.session_state.groups.remove(existing)
+            existing['strength'] = group_strength
+            existing['valence'] = group_valence
+            st.session_state.groups.append(existing)
+            st.success(f"Updated strength and valence of the group: {', '.join(members)}")
+        elif existing is not None:
+            st.info("This group already exists.")
         else:
-            st.info("All these connections already exist.")
+            new_pairs = sum(1 for pair in combinations(members, 2) if pair_attrs(pair) is None)
+            st.session_state.groups.append({
+                'members': members,
+                'strength': group_strength,
+                'valence': group_valence
+            })
+            st.success(f"Added a group of {len(members)} contacts who all know each other ({new_pairs} new connections).")
 
 st.write("### Current Connections")
-if len(st.session_state.edges) == 0:
+if len(st.session_state.edges) == 0 and len(st.session_state.groups) == 0:
     st.write("No connections yet.")
 else:
+    for g in st.session_state.groups:
+        st.write(f"Group: {', '.join(g['members'])} (all connected) | Strength: {g['strength']} | Valence: {g['valence']}")
     for e in sorted(st.session_state.edges):
-        st.write(f"{e[0]} <--> {e[1]}")
+        e_strength, e_valence = st.session_state.edge_attrs.get(e, default_edge_attrs)
+        st.write(f"{e[0]} <--> {e[1]} | Strength: {e_strength} | Valence: {e_valence}")
+
+# Weighted metrics run over a compact CSR adjacency: each undirected edge is stored
+# once per direction, with tie strength and valence sign held in parallel arrays.
+valence_signs = {"Positive": 1, "Neutral": 0, "Negative": -1}
+valence_names = {v: k for k, v in valence_signs.items()}
+
+def connection_arrays(nodes, edges, edge_attrs, groups):
+    # Expand single connections and groups into unique (lo, hi) index pairs with
+    # their strength and sign. Single connections come first, then groups from
+    # newest to oldest, and the first rating of a pair wins (matching pair_attrs).
+    index = {n: i for i, n in enumerate(nodes)}
+    lo, hi, strengths, signs = [], [], [], []
+    single_lo, single_hi, single_strengths, single_signs = [], [], [], []
+    for e in edges:
+        if e[0] in index and e[1] in index:
+            strength, valence = edge_attrs.get(e, default_edge_attrs)
+            single_lo.append(index[e[0]])
+            single_hi.append(index[e[1]])
+            single_strengths.append(strength)
+            single_signs.append(valence_signs[valence])
+    lo.append(np.array(single_lo, dtype=np.int64))
+    hi.append(np.array(single_hi, dtype=np.int64))
+    strengths.append(np.array(single_strengths, dtype=float))
+    signs.append(np.array(single_signs, dtype=float))
+    for g in reversed(groups):
+        members = np.array([index[m] for m in g['members'] if m in index], dtype=np.int64)
+        i, j = np.triu_indices(len(members), k=1)
+        lo.append(members[i])
+        hi.append(members[j])
+        strengths.append(np.full(len(i), g['strength'], dtype=float))
+        signs.append(np.full(len(i), valence_signs[g['valence']], dtype=float))
+    lo, hi = np.concatenate(lo), np.concatenate(hi)
+    lo, hi = np.minimum(lo, hi), np.maximum(lo, hi)
+    _, first = np.unique(lo * len(nodes) + hi, return_index=True)
+    return lo[first], hi[first], np.concatenate(strengths)[first], np.concatenate(signs)[first]
+
+def build_weighted_adjacency(num_nodes, lo, hi, strengths, signs):
+    # Each undirected edge is stored once per direction
+    shape = (num_nodes, num_nodes)
+    rows = np.concatenate([lo, hi])
+    cols = np.concatenate([hi, lo])
+    strength_adj = csr_matrix((np.concatenate([strengths, strengths]), (rows, cols)), shape=shape)
+    sign_adj = csr_matrix((np.concatenate([signs, signs]), (rows, cols)), shape=shape)
+    return strength_adj, sign_adj
+
+def membership_components(nodes, edges, groups):
+    # Components only need each group linked as a star (O(k) instead of O(k^2) pairs)
+    index = {n: i for i, n in enumerate(nodes)}
+    rows, cols = [], []
+    for e in edges:
+        if e[0] in index and e[1] in index:
+            rows.append(index[e[0]])
+            cols.append(index[e[1]])
+    for g in groups:
+        members = [index[m] for m in g['members'] if m in index]
+        rows += members[:1] * (len(members) - 1)
+        cols += members[1:]
+    star_adj = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(nodes), len(nodes)))
+    return connected_components(star_adj, directed=False)
+
+def weighted_closeness(strength_adj):
+    # Stronger ties are shorter paths (distance = 1 / strength). Scaled by the
+    # reachable share of the network, like networkx's closeness_centrality.
+    n = strength_adj.shape[0]
+    if n < 2:
+        return np.zeros(n)
+    distance_adj = strength_adj.copy()
+    distance_adj.data = 1.0 / distance_adj.data
+    dist = shortest_path(distance_adj, method='D', directed=False)
+    finite = np.isfinite(dist)
+    reachable = finite.sum(axis=1) - 1
+    totals = np.where(finite, dist, 0).sum(axis=1)
+    closeness = np.zeros(n)
+    has_paths = totals > 0
+    closeness[has_paths] = (reachable[has_paths] / totals[has_paths]) * (reachable[has_paths] / (n - 1))
+    return closeness
+
+def weighted_clustering(strength_adj):
+    # Geometric mean of normalized triangle weights (Onnela et al.), matching
+    # networkx's clustering(G, weight=...).
+    n = strength_adj.shape[0]
+    if strength_adj.nnz == 0:
+        return np.zeros(n)
+    cube_root = strength_adj / strength_adj.data.max()
+    cube_root.data = np.cbrt(cube_root.data)
+    triangles = np.asarray((cube_root @ cube_root).multiply(cube_root).sum(axis=1)).ravel()
+    degrees = np.diff(strength_adj.indptr)
+    possible = degrees * (degrees - 1)
+    clustering = np.zeros(n)
+    clustering[possible > 0] = triangles[possible > 0] / possible[possible > 0]
+    return clustering
+
+def signed_balance(sign_adj):
+    # Share of fully signed triangles (no neutral ties) whose sign product is
+    # positive. trace(S^3) counts balanced minus unbalanced triangles, trace(|S|^3) all of them.
+    abs_adj = abs(sign_adj)
+    signed_total = (sign_adj @ sign_adj).multiply(sign_adj).sum()
+    all_total = (abs_adj @ abs_adj).multiply(abs_adj).sum()
+    if all_total == 0:
+        return None
+    return (1 + signed_total / all_total) / 2
 
 st.header("Step 4: Compute Network Measures")
 if st.button("Compute Metrics"):
     G = nx.Graph()
     for name, info in contact_dict.items():
         G.add_node(name, domains=info['domains'], avg_strength=info['avg_strength'], valence=info['final_valence'])
-    for e in st.session_state.edges:
-        G.add_edge(*e)
+
+    nodes = list(G.nodes)
+    lo, hi, edge_strengths, edge_signs = connection_arrays(nodes, st.session_state.edges, st.session_state.edge_attrs, st.session_state.groups)
+    strength_adj, sign_adj = build_weighted_adjacency(len(nodes), lo, hi, edge_strengths, edge_signs)
+    closeness = dict(zip(nodes, weighted_closeness(strength_adj)))
 
     num_nodes = G.number_of_nodes()
-    num_edges = G.number_of_edges()
+    num_edges = len(lo)
     max_edges = num_nodes*(num_nodes-1)/2 if num_nodes > 1 else 1
     density = num_edges / max_edges if max_edges > 0 else 0
     
-    degree_dict = dict(G.degree())
+    degree_dict = dict(zip(nodes, np.diff(strength_adj.indptr).tolist()))
     domain_counts = {}
     for _, data in G.nodes(data=True):
         for d in data['domains']:
@@ -203,27 +478,40 @@ if st.button("Compute Metrics"):
         
     st.subheader("Connectivity")
     if num_nodes > 0:
-        connected = nx.is_connected(G)
-        num_components = nx.number_connected_components(G)
-        if connected:
+        num_components, component_labels = membership_components(nodes, st.session_state.edges, st.session_state.groups)
+        if num_components == 1:
             st.write("Your network is fully connected (only one connected component).")
         else:
             st.write(f"Your network is not fully connected. It has {num_components} connected components.")
-            components = list(nx.connected_components(G))
-            largest_component = max(components, key=len) if components else set()
-            st.write(f"The largest connected component has {len(largest_component)} contacts.")
+            largest_component_size = np.bincount(component_labels).max()
+            st.write(f"The largest connected component has {largest_component_size} contacts.")
 
-        # Closure via average clustering coefficient
-        avg_clustering = nx.average_clustering(G)
+        # Closure via average clustering coefficient (all ties at equal strength)
+        avg_clustering = weighted_clustering(strength_adj.astype(bool).astype(float)).mean()
         st.subheader("Closure (Approx. via Clustering Coefficient)")
         st.write(f"The average clustering coefficient is {avg_clustering:.3f} (max = 1.0). Higher values suggest your contacts tend to know each other, indicating greater closure.")
+        avg_weighted_clustering = weighted_clustering(strength_adj).mean()
+        st.write(f"Weighting each triangle by the strength of its connections, the average clustering coefficient is {avg_weighted_clustering:.3f}. A value close to the one above means your closed triads are held together by ties as strong as your strongest connections.")
+
+        balance = signed_balance(sign_adj)
+        st.subheader("Balance (Signed Triads)")
+        if balance is None:
+            st.write("Not enough rated connections to assess balance. Mark connections as positive or negative to see whether your triads are balanced.")
+        else:
+            st.write(f"{balance*100:.1f}% of the triads formed by positive and negative connections are balanced (e.g., a friend of a friend is a friend, or two contacts share a rival). Unbalanced triads often signal tension that may pull the group apart.")
+
+    # Eigenvector/PageRank centrality and the visualization need explicit
+    # edges, so connections are only expanded into the graph here
+    G.add_edges_from(
+        (nodes[i], nodes[j], {'strength': int(w), 'valence': valence_names[int(v)]})
+        for i, j, w, v in zip(lo, hi, edge_strengths, edge_signs)
+    )
 
     # Centrality measures
     use_eigen = True
     if num_nodes > 0 and num_edges > 0:
         try:
             eigen_centrality = nx.eigenvector_centrality_numpy(G)
-            closeness = nx.closeness_centrality(G)
             top_eigen_node, _ = max(eigen_centrality.items(), key=lambda x: x[1])
             furthest_node, _ = min(closeness.items(), key=lambda x: x[1])
 
@@ -237,7 +525,6 @@ if st.button("Compute Metrics"):
             top_pr_node, _ = max(page_rank.items(), key=lambda x: x[1])
             st.subheader("Additional Insights (PageRank Fallback)")
             st.write(f"**Central Influence (Based on PageRank):** {top_pr_node} appears central when considering how influence might flow through the network.")
-            closeness = nx.closeness_centrality(G)
             furthest_node, _ = min(closeness.items(), key=lambda x: x[1])
             st.write(f"**Most Distant Contact:** {furthest_node} seems to be relatively far from most others, possibly on the periphery of your network.")
 
@@ -359,8 +646,7 @@ if st.button("Compute Metrics"):
         # Closeness Dimension
         closeness_values = []
         if num_nodes>0 and num_edges>0:
-            closeness_dict = nx.closeness_centrality(G)
-            closeness_values = list(closeness_dict.values())
+            closeness_values = list(closeness.values())
         if closeness_values:
             closeness_values_sorted = sorted(closeness_values)
             median_closeness = closeness_values_sorted[len(closeness_values_sorted)//2]
@@ -401,8 +687,9 @@ if st.button("Compute Metrics"):
         title = f"Name: {n}<br>Domains: {', '.join(data['domains'])}<br>Avg Strength: {data['avg_strength']}<br>Valence: {data['valence']}"
         node_color = color_map.get(data['valence'], "#d3d3d3")
         nt.add_node(n, label=n, title=title, color=node_color)
-    for u,v in G.edges():
-        nt.add_edge(u,v)
+    for u,v,data in G.edges(data=True):
+        title = f"Strength: {data['strength']}<br>Valence: {data['valence']}"
+        nt.add_edge(u,v, title=title, width=data['strength'], color=color_map.get(data['valence'], "#d3d3d3"))
     
     with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_file:
         nt.save_graph(tmp_file.name)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Load test for the Social Capital Assessment Tool.
+
+Drives app.py through Streamlit's AppTest in N concurrent simulated sessions,
+each entering a synthetic network (contacts, finalize, group and single
+connections, Compute Metrics), and reports per-step latency percentiles,
+throughput and process memory.
+
+All sessions share one process, as they do on a Streamlit server. AppTest
+swaps a process-global runtime for every rerun, so reruns execute one at a
+time behind a lock; CPU-bound reruns on a real server largely serialize on
+the GIL anyway. Step latencies include the time spent waiting for other
+sessions, which is how Compute Metrics degrades as more students connect.
+
+Example:
+    python load_test.py --sessions 20 --contacts 60 --groups 4 --group-size 10
+"""
+
+import argparse
+import os
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+
+from streamlit.testing.v1 import AppTest
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Must match the domains in app.py
+domains = ["Family/Friends", "Work/Professional", "Education/Alumni",
+           "Community/Volunteering", "Hobbies/Recreational Groups"]
+
+steps = ["load", "enter_contacts", "finalize", "add_group", "add_single", "compute_metrics"]
+
+run_lock = threading.Lock()
+
+
+def synthetic_network(rng, num_contacts, num_groups, group_size, num_singles):
+    # Random letter names keep accidental near-duplicate flags rare
+    names = set()
+    while len(names) < num_contacts:
+        first = ''.join(rng.choices(string.ascii_lowercase, k=6)).title()
+        last = ''.join(rng.choices(string.ascii_lowercase, k=8)).title()
+        names.add(f"{first} {last}")
+    names = sorted(names)
+    contacts = [
+        {
+            'name': name,
+            'domain': domains[i % len(domains)],
+            'tie_strength': rng.randint(1, 5),
+            'valence': rng.choice(["Positive", "Neutral", "Negative"])
+        }
+        for i, name in enumerate(names)
+    ]
+    groups = [rng.sample(names, min(group_size, len(names))) for _ in range(num_groups)]
+    singles = [rng.sample(names, 2) for _ in range(num_singles)] if len(names) >= 2 else []
+    return contacts, groups, singles
+
+
+def timed(timings, step, fn):
+    start = time.perf_counter()
+    result = fn()
+    # Steps that never reached a rerun would skew the percentiles
+    if result is not None:
+        timings.setdefault(step, []).append(time.perf_counter() - start)
+    return result
+
+
+def rerun(at, errors):
+    with run_lock:
+        at.run()
+    # AppTest rebuilds the element tree on every run, so collect exceptions now
+    errors.extend(e.value for e in at.exception)
+    return at
+
+
+def click(at, label, errors):
+    button = next((b for b in at.button if b.label == label), None)
+    if button is None:
+        errors.append(f"'{label}' button not found")
+        return None
+    button.click()
+    return rerun(at, errors)
+
+
+def run_session(session_id, args, timings, errors):
+    rng = random.Random(args.seed + session_id)
+    contacts, groups, singles = synthetic_network(rng, args.contacts, args.groups, args.group_size, args.singles)
+
+    at = timed(timings, "load", lambda: rerun(AppTest.from_file(APP_PATH, default_timeout=args.timeout), errors))
+
+    def enter_contacts():
+        by_domain = {d: [c for c in contacts if c['domain'] == d] for d in domains}
+        for d in domains:
+            at.number_input(key=f"num_{d}").set_value(len(by_domain[d]))
+        rerun(at, errors)
+        for d in domains:
+            for i, c in enumerate(by_domain[d]):
+                at.text_input(key=f"name_{d}_{i}").set_value(c['name'])
+                at.slider(key=f"strength_{d}_{i}").set_value(c['tie_strength'])
+                at.selectbox(key=f"valence_{d}_{i}").set_value(c['valence'])
+        return rerun(at, errors)
+    timed(timings, "enter_contacts", enter_contacts)
+
+    timed(timings, "finalize", lambda: click(at, "Finalize Contact List", errors))
+
+    for members in groups:
+        at.multiselect[0].set_value(members)
+        at.slider(key="group_strength").set_value(rng.randint(1, 5))
+        at.selectbox(key="group_valence").set_value(rng.choice(["Positive", "Neutral", "Negative"]))
+        timed(timings, "add_group", lambda: click(at, "Add Selected Connections", errors))
+
+    for a, b in singles:
+        next(s for s in at.selectbox if s.label == "Contact A").set_value(a)
+        next(s for s in at.selectbox if s.label == "Contact B").set_value(b)
+        at.slider(key="edge_strength").set_value(rng.randint(1, 5))
+        timed(timings, "add_single", lambda: click(at, "Add Single Connection", errors))
+
+    timed(timings, "compute_metrics", lambda: click(at, "Compute Metrics", errors))
+
+
+def safe_run_session(session_id, args):
+    # A session that breaks part-way is reported as failed instead of
+    # aborting the whole run; timings of the steps it completed still count
+    timings, errors = {}, []
+    try:
+        run_session(session_id, args, timings, errors)
+    except Exception as exc:
+        errors.append(f"{type(exc).__name__}: {exc}")
+    return timings, errors
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if os.uname().sysname == "Darwin" else maxrss / 1024
+
+
+def percentile_row(step, durations):
+    ms = sorted(d * 1000 for d in durations)
+    if len(ms) > 1:
+        cuts = quantiles(ms, n=100, method='inclusive')
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = ms[0]
+    return f"{step:<16}{len(ms):>7}{p50:>10.1f}{p90:>10.1f}{p99:>10.1f}{ms[-1]:>10.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py")
+    parser.add_argument("--sessions", type=int, default=10, help="number of simulated student sessions")
+    parser.add_argument("--concurrency", type=int, default=None, help="sessions running at once (default: all)")
+    parser.add_argument("--contacts", type=int, default=30, help="contacts per session")
+    parser.add_argument("--groups", type=int, default=3, help="multi-select groups added per session")
+    parser.add_argument("--group-size", type=int, default=6, help="members per group")
+    parser.add_argument("--singles", type=int, default=10, help="single connections added per session")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    concurrency = args.concurrency or args.sessions
+    print(f"Running {args.sessions} sessions ({concurrency} at a time), "
+          f"{args.contacts} contacts, {args.groups} groups of {args.group_size}, {args.singles} single connections each")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: safe_run_session(i, args), range(args.sessions)))
+    elapsed = time.perf_counter() - start
+
+    all_timings = {}
+    failed = 0
+    for timings, errors in results:
+        for step, durations in timings.items():
+            all_timings.setdefault(step, []).extend(durations)
+        if errors:
+            failed += 1
+            print(f"Session error: {errors[0]}")
+
+    print()
+    print(f"{'step':<16}{'count':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step in steps:
+        if all_timings.get(step):
+            print(percentile_row(step, all_timings[step]))
+
+    num_steps = sum(len(d) for d in all_timings.values())
+    print()
+    print(f"Wall time: {elapsed:.1f}s")
+    print(f"Throughput: {args.sessions / elapsed:.2f} sessions/s, {num_steps / elapsed:.1f} steps/s")
+    print(f"Failed sessions: {failed}/{args.sessions}")
+    memory = peak_memory_mb()
+    print(f"Peak server memory (RSS): {memory:.0f} MB" if memory is not None else "Peak server memory: n/a on this platform")
+
+
+if __name__ == "__main__":
+    main()